@@ -3,7 +3,7 @@ Core configuration settings for the SoleCraft API.
 """
 
 from functools import lru_cache
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import Field, EmailStr
 from pydantic_settings import BaseSettings
 
@@ -49,6 +49,13 @@ class Settings(BaseSettings):
     email_from: str = Field(default="noreply@solecraft.com", env="EMAIL_FROM")
     email_from_name: str = Field(default="SoleCraft", env="EMAIL_FROM_NAME")
     admin_email: str = Field(default="admin@solecraft.com", env="ADMIN_EMAIL")
+    # Optional SendGrid Dynamic Template ids keyed by email name (e.g. {"welcome": "d-..."})
+    sendgrid_template_ids: Dict[str, str] = Field(default_factory=dict, env="SENDGRID_TEMPLATE_IDS")
+    sendgrid_rate_limit_per_minute: int = Field(default=600, env="SENDGRID_RATE_LIMIT_PER_MINUTE")
+    sendgrid_circuit_failure_threshold: int = Field(default=5, env="SENDGRID_CIRCUIT_FAILURE_THRESHOLD")
+    sendgrid_circuit_reset_seconds: int = Field(default=60, env="SENDGRID_CIRCUIT_RESET_SECONDS")
+    sendgrid_max_concurrency: int = Field(default=4, env="SENDGRID_MAX_CONCURRENCY")
+    sendgrid_max_per_connection: int = Field(default=4500, env="SENDGRID_MAX_PER_CONNECTION")
     
     # Frontend Configuration
     frontend_url: str = Field(default="http://localhost:3000", env="FRONTEND_URL")
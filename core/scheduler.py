@@ -6,15 +6,19 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 import structlog
 
 from services.background_tasks_service import (
-    cleanup_guest_users,
-    cleanup_abandoned_carts,
+    run_all_cleanups,
+    retry_deferred_emails,
     process_pending_orders,
     check_low_inventory,
 )
 
 logger = structlog.get_logger(__name__)
 
-scheduler = AsyncIOScheduler()
+# If a run is delayed (e.g. the loop was busy or the app was down), execute it
+# once instead of replaying every missed firing back to back
+scheduler = AsyncIOScheduler(
+    job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 300}
+)
 
 def initialize_scheduler():
     """
@@ -25,21 +29,12 @@ def initialize_scheduler():
         
         # Add jobs from the former celery beat schedule
         scheduler.add_job(
-            cleanup_guest_users,
+            run_all_cleanups,
             trigger="cron",
             hour=2,
             minute=0,
-            id="cleanup_guest_users",
-            name="Clean up guest users daily at 2 AM",
-            replace_existing=True,
-        )
-        scheduler.add_job(
-            cleanup_abandoned_carts,
-            trigger="cron",
-            hour="*/6",
-            minute=0,
-            id="cleanup_abandoned_carts",
-            name="Clean up abandoned carts every 6 hours",
+            id="run_all_cleanups",
+            name="Clean up guest users and abandoned carts daily at 2 AM",
             replace_existing=True,
         )
         scheduler.add_job(
@@ -60,6 +55,15 @@ def initialize_scheduler():
             replace_existing=True,
         )
         
+        scheduler.add_job(
+            retry_deferred_emails,
+            trigger="interval",
+            minutes=5,
+            id="retry_deferred_emails",
+            name="Retry deferred emails every 5 minutes",
+            replace_existing=True,
+        )
+        
         scheduler.start()
         logger.info("Scheduler started successfully.")
         
@@ -15,6 +15,7 @@ from core.config import settings
 from core.database import init_database, close_database
 from models.schemas import HealthCheck, ErrorResponse
 from core.scheduler import initialize_scheduler, shutdown_scheduler
+from services.background_tasks_service import close_email_service
 
 
 # Configure structured logging
@@ -79,6 +80,7 @@ async def lifespan(app: FastAPI):
         logger.info("Shutting down SoleCraft API")
         try:
             shutdown_scheduler()
+            await close_email_service()
             await close_database()
             logger.info("Application shutdown completed")
         except Exception as e:
@@ -0,0 +1,48 @@
+"""Add order user_id/payment_status index
+
+Replaces ix_order_user_id, whose lookups the composite index also serves.
+
+Revision ID: df92cb5deb6b
+Revises: seeddata0100
+Create Date: 2026-10-15 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "df92cb5deb6b"
+down_revision = "seeddata0100"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_order_user_id_payment_status",
+            "order",
+            ["user_id", "payment_status"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index("ix_order_user_id", table_name="order", postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_order_user_id",
+            "order",
+            ["user_id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_order_user_id_payment_status",
+            table_name="order",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,41 @@
+"""Cascade deletes for cart, cart item, address and order item foreign keys
+
+Revision ID: 7b3e41a0c2f5
+Revises: df92cb5deb6b
+Create Date: 2026-10-15 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7b3e41a0c2f5"
+down_revision = "df92cb5deb6b"
+branch_labels = None
+depends_on = None
+
+
+# (constraint name, source table, local column, referred table)
+CASCADE_FOREIGN_KEYS = [
+    ("fk_cartitem_cart_id_cart", "cartitem", "cart_id", "cart"),
+    ("fk_cart_user_id_user", "cart", "user_id", "user"),
+    ("fk_address_user_id_user", "address", "user_id", "user"),
+    ("fk_orderitem_order_id_order", "orderitem", "order_id", "order"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    for name, source, column, referent in CASCADE_FOREIGN_KEYS:
+        op.drop_constraint(name, source, type_="foreignkey")
+        op.create_foreign_key(
+            name, source, referent, [column], ["id"], ondelete="CASCADE"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    for name, source, column, referent in CASCADE_FOREIGN_KEYS:
+        op.drop_constraint(name, source, type_="foreignkey")
+        op.create_foreign_key(name, source, referent, [column], ["id"])
@@ -0,0 +1,43 @@
+"""Add indexes for guest and abandoned cart cleanup
+
+Revision ID: 3c8d5f92ab17
+Revises: 7b3e41a0c2f5
+Create Date: 2026-10-15 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3c8d5f92ab17"
+down_revision = "7b3e41a0c2f5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_user_guest_created_at",
+            "user",
+            ["created_at"],
+            unique=False,
+            postgresql_where=sa.text("is_guest"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_cart_updated_at_id",
+            "cart",
+            ["updated_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_cart_updated_at_id", table_name="cart", postgresql_concurrently=True)
+        op.drop_index("ix_user_guest_created_at", table_name="user", postgresql_concurrently=True)
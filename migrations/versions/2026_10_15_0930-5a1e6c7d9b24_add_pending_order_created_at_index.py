@@ -0,0 +1,35 @@
+"""Add partial index for pending order sweeps
+
+Revision ID: 5a1e6c7d9b24
+Revises: 3c8d5f92ab17
+Create Date: 2026-10-15 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5a1e6c7d9b24"
+down_revision = "3c8d5f92ab17"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_order_pending_created_at",
+            "order",
+            ["created_at"],
+            unique=False,
+            postgresql_where=sa.text("payment_status = 'pending'"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_order_pending_created_at", table_name="order", postgresql_concurrently=True)
@@ -0,0 +1,29 @@
+"""Add stock quantity to products
+
+Revision ID: 8e2b4d6f1a37
+Revises: 5a1e6c7d9b24
+Create Date: 2026-10-15 09:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8e2b4d6f1a37"
+down_revision = "5a1e6c7d9b24"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    op.add_column(
+        "product",
+        sa.Column("stock_quantity", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_column("product", "stock_quantity")
@@ -22,7 +22,7 @@ class Cart(Base, TimestampMixin):
     )
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
-        ForeignKey("user.id"),
+        ForeignKey("user.id", ondelete="CASCADE"),
         nullable=False
     )
     
@@ -34,13 +34,15 @@ class Cart(Base, TimestampMixin):
     items: Mapped[List["CartItem"]] = relationship(
         "CartItem",
         back_populates="cart",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
     
     # Indexes
     __table_args__ = (
         Index('ix_cart_user_id', 'user_id'),
         Index('ix_cart_session_id', 'session_id'),
+        Index('ix_cart_updated_at_id', 'updated_at', 'id'),
     )
     
     def __repr__(self) -> str:
@@ -57,7 +59,7 @@ class CartItem(Base, TimestampMixin):
     )
     cart_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
-        ForeignKey("cart.id"),
+        ForeignKey("cart.id", ondelete="CASCADE"),
         nullable=False
     )
     product_id: Mapped[uuid.UUID] = mapped_column(
@@ -4,7 +4,7 @@ Order domain SQLAlchemy models.
 
 from decimal import Decimal
 from typing import List, Optional
-from sqlalchemy import String, ForeignKey, Index, Integer, DECIMAL, JSON, Text, DateTime
+from sqlalchemy import String, ForeignKey, Index, Integer, DECIMAL, JSON, Text, DateTime, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
@@ -81,16 +81,22 @@ class Order(Base, TimestampMixin):
     items: Mapped[List["OrderItem"]] = relationship(
         "OrderItem",
         back_populates="order",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
     discount_code: Mapped[Optional["DiscountCode"]] = relationship("DiscountCode")
     
     # Indexes
     __table_args__ = (
-        Index('ix_order_user_id', 'user_id'),
         Index('ix_order_number', 'order_number'),
         Index('ix_order_status', 'status'),
         Index('ix_order_payment_status', 'payment_status'),
+        Index('ix_order_user_id_payment_status', 'user_id', 'payment_status'),
+        Index(
+            'ix_order_pending_created_at',
+            'created_at',
+            postgresql_where=text("payment_status = 'pending'"),
+        ),
     )
     
     def __repr__(self) -> str:
@@ -107,7 +113,7 @@ class OrderItem(Base, TimestampMixin):
     )
     order_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
-        ForeignKey("order.id"),
+        ForeignKey("order.id", ondelete="CASCADE"),
         nullable=False
     )
     product_id: Mapped[uuid.UUID] = mapped_column(
@@ -30,6 +30,11 @@ class Product(Base, TimestampMixin):
     # Pricing
     base_price: Mapped[Decimal] = mapped_column(DECIMAL(10, 2), nullable=False)
     
+    # Inventory
+    stock_quantity: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    
     # Product status and visibility
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     is_featured: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
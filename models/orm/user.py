@@ -4,7 +4,7 @@ User domain SQLAlchemy models.
 
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import String, Boolean, DateTime, ForeignKey, Text, Index
+from sqlalchemy import String, Boolean, DateTime, ForeignKey, Text, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -41,13 +41,15 @@ class User(Base, TimestampMixin):
     addresses: Mapped[List["Address"]] = relationship(
         "Address", 
         back_populates="user",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
     cart: Mapped[Optional["Cart"]] = relationship(
         "Cart", 
         back_populates="user",
         uselist=False,
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
     orders: Mapped[List["Order"]] = relationship(
         "Order", 
@@ -63,6 +65,7 @@ class User(Base, TimestampMixin):
     __table_args__ = (
         Index('ix_user_email', 'email'),
         Index('ix_user_session_id', 'session_id'),
+        Index('ix_user_guest_created_at', 'created_at', postgresql_where=text('is_guest')),
     )
     
     def __repr__(self) -> str:
@@ -79,7 +82,7 @@ class Address(Base, TimestampMixin):
     )
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
-        ForeignKey("user.id"),
+        ForeignKey("user.id", ondelete="CASCADE"),
         nullable=False
     )
     
@@ -5,7 +5,7 @@ from typing import List, Tuple, Optional
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
+from sqlalchemy import func, case, cast, BigInteger, table, column
 from sqlalchemy.orm import selectinload
 
 from models.orm.order import Order
@@ -13,21 +13,53 @@ from models.orm.user import User
 from models.orm.product import Product
 from models.schemas.order import OrderStatus, PaymentStatus, OrderUpdate
 
+# Above this many rows the planner's estimate is used instead of COUNT(*)
+COUNT_ESTIMATE_THRESHOLD = 100_000
+
+pg_class = table(
+    "pg_class", column("relname"), column("relkind"), column("relnamespace"), column("reltuples")
+)
+pg_namespace = table("pg_namespace", column("oid"), column("nspname"))
+
+
+def _table_count(model, use_estimate: bool = True):
+    """
+    Row count for a table, using pg_class.reltuples once the table is large.
+    The estimate is PostgreSQL-only; pass use_estimate=False elsewhere.
+    """
+    exact = select(func.count()).select_from(model).scalar_subquery()
+    if not use_estimate:
+        return exact
+    # Scope to the current schema so a same-named table elsewhere can't
+    # make the subquery return more than one row
+    estimate = (
+        select(cast(pg_class.c.reltuples, BigInteger))
+        .select_from(pg_class.join(pg_namespace, pg_class.c.relnamespace == pg_namespace.c.oid))
+        .where(
+            pg_class.c.relname == model.__tablename__,
+            pg_class.c.relkind == "r",
+            pg_namespace.c.nspname == func.current_schema(),
+        )
+        .scalar_subquery()
+    )
+    return case((estimate > COUNT_ESTIMATE_THRESHOLD, estimate), else_=exact)
+
 
 class AdminService:
     """Service for admin operations."""
 
     async def get_dashboard_statistics(self, session: AsyncSession) -> dict:
         """Get dashboard statistics."""
-        total_users_result = await session.execute(select(func.count(User.id)))
-        total_orders_result = await session.execute(select(func.count(Order.id)))
-        total_products_result = await session.execute(select(func.count(Product.id)))
-
-        return {
-            "total_users": total_users_result.scalar_one(),
-            "total_orders": total_orders_result.scalar_one(),
-            "total_products": total_products_result.scalar_one(),
-        }
+        # All counts in a single round trip
+        use_estimate = session.get_bind().dialect.name == "postgresql"
+        result = await session.execute(
+            select(
+                _table_count(User, use_estimate).label("total_users"),
+                _table_count(Order, use_estimate).label("total_orders"),
+                _table_count(Product, use_estimate).label("total_products"),
+            )
+        )
+        return dict(result.one()._mapping)
 
     async def list_all_orders(self, session: AsyncSession) -> List[Order]:
         """List all orders for admin."""
@@ -2,95 +2,489 @@
 Service for handling background tasks, such as sending emails and processing data.
 """
 
-from typing import Optional, Dict, Any
+import asyncio
+import gzip
+import random
+import re
+import threading
+import time
+import zlib
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, Deque, Dict, Any, List, Set, Tuple
+import httpx
+import orjson
 import structlog
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, From, To, Subject, HtmlContent, PlainTextContent
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from sqlalchemy import (
+    Integer, bindparam, select, update, delete, and_, exists, func, literal, tuple_, text, values, column
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import aliased, joinedload
 
 from core.config import settings
+from core.database import db_manager
+from models.orm.order import Order, OrderItem
+from models.orm.product import Product
+from models.orm.user import User
+from models.orm.review import Review
+from models.orm.cart import Cart
 
 logger = structlog.get_logger(__name__)
 
+SENDGRID_API_URL = "https://api.sendgrid.com"
+SENDGRID_TIMEOUT = 10.0
+SENDGRID_MAX_ATTEMPTS = 3
+SENDGRID_RETRY_BASE_DELAY = 1.0
+SENDGRID_MAX_RETRY_DELAY = 30.0
+SENDGRID_DEFERRED_MAX = 10_000
+
+
+class SendGridRetryableError(Exception):
+    """A SendGrid failure (throttling, 5xx, network) that may succeed on retry."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Email templates are compiled once at import; only rendering happens per send
+_TEMPLATE_DIR = Path(__file__).resolve().parent / "email_templates"
+_EMAIL_ENV = Environment(
+    loader=FileSystemLoader(_TEMPLATE_DIR),
+    autoescape=select_autoescape(enabled_extensions=("html.j2",)),
+    auto_reload=False,
+    cache_size=-1,
+)
+_EMAIL_TEMPLATES = {
+    name: (
+        _EMAIL_ENV.get_template(f"{name}.html.j2"),
+        _EMAIL_ENV.get_template(f"{name}.txt.j2"),
+    )
+    for name in (
+        "welcome",
+        "verification",
+        "order_confirmation",
+        "password_reset",
+        "low_inventory",
+    )
+}
+
+
+def _render_email(name: str, **context) -> Tuple[str, str]:
+    """Render the HTML and plain-text bodies of a cached email template."""
+    html_template, text_template = _EMAIL_TEMPLATES[name]
+    return html_template.render(**context), text_template.render(**context)
+
+
+class TokenBucket:
+    """Thread-safe token bucket used to smooth outgoing SendGrid requests."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def consume(self, tokens: int = 1) -> bool:
+        """Take tokens if available without waiting."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    async def acquire(self, timeout: float = 5.0) -> bool:
+        """Wait up to `timeout` seconds for a token."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker that stops calling SendGrid during outages."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """
+        Closed: always allow. Open: refuse until `reset_timeout` has passed,
+        then let exactly one probe through (half-open). Further callers are
+        refused until that probe records a result, or a probe outlives
+        `reset_timeout` without reporting back.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                if now - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+            elif (
+                self._probe_started_at is not None
+                and now - self._probe_started_at < self.reset_timeout
+            ):
+                return False
+            self._probe_started_at = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probe_started_at = None
+            self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_started_at = None
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+_sendgrid_bucket = TokenBucket(
+    rate=settings.sendgrid_rate_limit_per_minute / 60,
+    capacity=max(1, settings.sendgrid_rate_limit_per_minute // 6),
+)
+_sendgrid_breaker = CircuitBreaker(
+    failure_threshold=settings.sendgrid_circuit_failure_threshold,
+    reset_timeout=settings.sendgrid_circuit_reset_seconds,
+)
+
+
+# Sender identity is fixed for the process lifetime
+_FROM = {"email": settings.email_from, "name": settings.email_from_name}
+
 
 class EmailService:
-    """SendGrid email service."""
+    """SendGrid email service backed by a pooled async HTTP client."""
     
     def __init__(self):
         if not settings.sendgrid_api_key:
             raise ValueError("SendGrid API key is not configured.")
-        self.client = SendGridAPIClient(api_key=settings.sendgrid_api_key)
-        self.from_email = From(settings.email_from, settings.email_from_name)
+        self.client = self._build_client()
+        self._sent_count = 0
+        self._retiring: Set[asyncio.Task] = set()
+        self._retiring_clients: Set[httpx.AsyncClient] = set()
+        # Sends that ran out of retries while SendGrid was unavailable or
+        # throttled; replayed by retry_deferred_emails()
+        self._deferred: Deque[Tuple[bytes, str, str]] = deque()
+        # Email is low priority: cap in-flight sends so a burst of signups
+        # cannot crowd out order processing on the shared event loop.
+        self._send_slots = asyncio.Semaphore(settings.sendgrid_max_concurrency)
     
-    def send_email(
+    async def send_email(
         self,
         to_email: str,
         subject_text: str,
         html_content: str,
-        text_content: Optional[str] = None,
+        text_content: str,
     ) -> bool:
         """Send email using SendGrid."""
-        try:
-            message = Mail(
-                from_email=self.from_email,
-                to_emails=To(to_email),
-                subject=Subject(subject_text),
-                html_content=HtmlContent(html_content)
-            )
-            
-            if text_content:
-                message.plain_text_content = PlainTextContent(text_content)
-            
-            response = self.client.send(message)
-            
-            if response.status_code in [200, 201, 202]:
-                logger.info("Email sent successfully", 
-                           to_email=to_email, 
+        payload = {
+            "personalizations": [{"to": [{"email": to_email}]}],
+            "from": _FROM,
+            "subject": subject_text,
+            # SendGrid requires text/plain to precede text/html
+            "content": [
+                {"type": "text/plain", "value": text_content},
+                {"type": "text/html", "value": html_content},
+            ],
+        }
+        return await self._send(payload, to_email, subject_text)
+    
+    async def send_template_email(
+        self,
+        to_email: str,
+        template_id: str,
+        dynamic_data: Dict[str, Any],
+    ) -> bool:
+        """Send email using a SendGrid Dynamic Template."""
+        payload = {
+            "personalizations": [
+                {"to": [{"email": to_email}], "dynamic_template_data": dynamic_data}
+            ],
+            "from": _FROM,
+            "template_id": template_id,
+        }
+        return await self._send(payload, to_email, dynamic_data.get("subject", template_id))
+    
+    async def close(self) -> None:
+        """Close the underlying HTTP connection pool, and any still being retired."""
+        for task in list(self._retiring):
+            task.cancel()
+        for client in list(self._retiring_clients):
+            await client.aclose()
+        self._retiring_clients.clear()
+        await self.client.aclose()
+    
+    @staticmethod
+    def _build_client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=SENDGRID_API_URL,
+            headers={
+                "Authorization": f"Bearer {settings.sendgrid_api_key}",
+                "Content-Type": "application/json",
+                "Content-Encoding": "gzip",
+            },
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            timeout=SENDGRID_TIMEOUT,
+        )
+    
+    def _next_client(self) -> httpx.AsyncClient:
+        """
+        Return the client for the next send, rebuilding the pool once it has
+        carried `sendgrid_max_per_connection` messages. The count is per pool,
+        not per connection, so it is conservative: no single connection in the
+        pool can have carried more than that before it is replaced.
+        """
+        client = self.client
+        self._sent_count += 1
+        if self._sent_count >= settings.sendgrid_max_per_connection:
+            self.client = self._build_client()
+            self._sent_count = 0
+            self._retiring_clients.add(client)
+            task = asyncio.create_task(self._retire_client(client))
+            self._retiring.add(task)
+            task.add_done_callback(self._retiring.discard)
+        return client
+    
+    async def _retire_client(self, client: httpx.AsyncClient) -> None:
+        # Requests already in flight on the old pool finish (or time out) within
+        # SENDGRID_TIMEOUT, after which its connections can be dropped.
+        await asyncio.sleep(SENDGRID_TIMEOUT)
+        self._retiring_clients.discard(client)
+        await client.aclose()
+    
+    async def _send(self, payload: Dict[str, Any], to_email: str, subject_text: str) -> bool:
+        """
+        Deliver a prepared message. Throttling (429), 5xx and network errors are
+        retried a bounded number of times; other 4xx responses are terminal.
+        """
+        # Level 1 is nearly free on CPU and still shrinks the repetitive markup severalfold
+        body = gzip.compress(orjson.dumps(payload), compresslevel=1)
+        return await self._deliver(body, to_email, subject_text)
+    
+    @property
+    def deferred_count(self) -> int:
+        return len(self._deferred)
+    
+    async def retry_deferred(self) -> int:
+        """
+        Replay the sends deferred so far, one attempt each. The first retryable
+        failure (throttling, an outage or an open breaker) ends the replay and
+        puts that send and the rest back at the head of the queue for the next
+        run. Returns how many were delivered.
+        """
+        pending = list(self._deferred)
+        self._deferred.clear()
+        delivered = 0
+        for index, (body, to_email, subject_text) in enumerate(pending):
+            try:
+                if await self._attempt(body, to_email, subject_text):
+                    delivered += 1
+            except SendGridRetryableError as e:
+                remaining = pending[index:]
+                self._deferred.extendleft(reversed(remaining))
+                logger.warning("Stopped replaying deferred emails",
+                               reason=str(e),
+                               requeued=len(remaining))
+                break
+        return delivered
+    
+    def _defer(self, body: bytes, to_email: str, subject_text: str) -> None:
+        if len(self._deferred) >= SENDGRID_DEFERRED_MAX:
+            logger.error("Deferred email queue full, dropping email",
+                         to_email=to_email,
+                         subject=subject_text)
+            return
+        self._deferred.append((body, to_email, subject_text))
+        logger.warning("Deferred email for later retry",
+                       to_email=to_email,
+                       subject=subject_text,
+                       deferred=len(self._deferred))
+    
+    async def _deliver(self, body: bytes, to_email: str, subject_text: str) -> bool:
+        for attempt in range(1, SENDGRID_MAX_ATTEMPTS + 1):
+            try:
+                return await self._attempt(body, to_email, subject_text)
+            except SendGridRetryableError as e:
+                if attempt == SENDGRID_MAX_ATTEMPTS:
+                    self._defer(body, to_email, subject_text)
+                    return False
+                delay = _backoff_delay(attempt, e.retry_after)
+            logger.warning("Retrying email send",
+                           to_email=to_email,
                            subject=subject_text,
-                           status_code=response.status_code)
-                return True
-            else:
-                logger.error("SendGrid returned error", 
-                            status_code=response.status_code,
-                            body=response.body)
-                return False
-                
-        except Exception as e:
+                           attempt=attempt,
+                           delay=delay)
+            await asyncio.sleep(delay)
+        return False
+    
+    async def _attempt(
+        self, body: bytes, to_email: str, subject_text: str
+    ) -> bool:
+        """
+        Make one SendGrid request, honouring the rate limit and circuit breaker.
+        Raises SendGridRetryableError when the failure is worth retrying,
+        including when the breaker is open or no rate-limit token frees up.
+        """
+        if not await _sendgrid_bucket.acquire():
+            raise SendGridRetryableError("SendGrid rate limit reached")
+
+        # Checked after the token so a half-open probe is only claimed by a
+        # request that will actually be made
+        if not _sendgrid_breaker.allow_request():
+            raise SendGridRetryableError("SendGrid circuit open")
+
+        try:
+            async with self._send_slots:
+                response = await self._next_client().post("/v3/mail/send", content=body)
+        except httpx.HTTPError as e:
+            _sendgrid_breaker.record_failure()
             logger.error("Failed to send email", 
                         error=str(e), 
                         to_email=to_email, 
                         subject=subject_text)
-            return False
+            raise SendGridRetryableError(str(e)) from e
+            
+        if response.status_code >= 500:
+            _sendgrid_breaker.record_failure()
+        else:
+            _sendgrid_breaker.record_success()
+        
+        if response.status_code in [200, 201, 202]:
+            logger.info("Email sent successfully", 
+                       to_email=to_email, 
+                       subject=subject_text,
+                       status_code=response.status_code)
+            return True
+        
+        retryable = response.status_code == 429 or response.status_code >= 500
+        logger.error("SendGrid returned error", 
+                    status_code=response.status_code,
+                    retryable=retryable,
+                    body=response.text)
+        if retryable:
+            raise SendGridRetryableError(
+                f"SendGrid returned {response.status_code}", _retry_after(response)
+            )
+        return False
+
+
+def _backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Full-jitter exponential backoff, so a SendGrid hiccup does not bring every
+    pending send back at the same instant. Never waits less than Retry-After.
+    """
+    delay = random.uniform(0, min(SENDGRID_MAX_RETRY_DELAY, SENDGRID_RETRY_BASE_DELAY * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, SENDGRID_MAX_RETRY_DELAY))
+    return delay
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, if SendGrid sent one."""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+_email_service: Optional[EmailService] = None
+
+
+def get_email_service() -> EmailService:
+    """Return the process-wide EmailService, creating it on first use."""
+    global _email_service
+    if _email_service is None:
+        _email_service = EmailService()
+    return _email_service
+
+
+async def close_email_service() -> None:
+    """Close the shared EmailService connection pool, if one was created."""
+    global _email_service
+    if _email_service is not None:
+        await _email_service.close()
+        _email_service = None
+
+
+async def retry_deferred_emails():
+    """Periodic task to replay emails deferred during a SendGrid outage or throttling."""
+    if _email_service is None or not _email_service.deferred_count:
+        return
+    try:
+        pending = _email_service.deferred_count
+        delivered = await _email_service.retry_deferred()
+        logger.info("Retried deferred emails", pending=pending, delivered=delivered)
+    except Exception as e:
+        logger.error("Failed to retry deferred emails", error=str(e))
+
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+async def _send_templated_email(name: str, to_email: str, subject: str, **context) -> bool:
+    """
+    Send one of the named emails. Uses the SendGrid Dynamic Template configured
+    for `name` when there is one, otherwise renders the local template.
+    """
+    # Cheap pre-flight check, so sends that are bound to fail skip rendering
+    if not _EMAIL_RE.match(to_email):
+        logger.warning("Invalid recipient address, skipping email", to_email=to_email, subject=subject)
+        return False
+
+    email_service = get_email_service()
+    template_id = settings.sendgrid_template_ids.get(name)
+    if template_id:
+        return await email_service.send_template_email(
+            to_email, template_id, {"subject": subject, **context}
+        )
+    html_content, text_content = _render_email(name, **context)
+    return await email_service.send_email(to_email, subject, html_content, text_content)
+
+
+# Link prefixes only depend on settings, so build them once
+_VERIFY_EMAIL_URL_PREFIX = f"{settings.frontend_url}/auth/verify-email?token="
+_RESET_PASSWORD_URL_PREFIX = f"{settings.frontend_url}/reset-password?token="
 
 
-def send_welcome_email(user_id: str, email: str, first_name: str):
+async def send_welcome_email(user_id: str, email: str, first_name: str):
     """Send welcome email to new user."""
     try:
-        email_service = EmailService()
         subject = "Welcome to SoleCraft!"
-        
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Welcome to SoleCraft</title>
-        </head>
-        <body>
-            <div class="container">
-                <h1>Welcome to SoleCraft, {first_name}!</h1>
-                <p>Your journey to custom shoes begins here</p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        text_content = f"""
-        Welcome to SoleCraft, {first_name}!
-        Thank you for creating an account with SoleCraft.
-        """
-        
-        success = email_service.send_email(email, subject, html_content, text_content)
+        success = await _send_templated_email("welcome", email, subject, first_name=first_name)
         
         if success:
             logger.info("Welcome email sent successfully", user_id=user_id, email=email)
@@ -101,38 +495,14 @@ def send_welcome_email(user_id: str, email: str, first_name: str):
         logger.error("Welcome email task failed", error=str(e), user_id=user_id, email=email)
 
 
-def send_verification_email(user_id: str, email: str, verification_token: str):
+async def send_verification_email(user_id: str, email: str, verification_token: str):
     """Send email verification link."""
     try:
-        email_service = EmailService()
-        verification_url = f"{settings.frontend_url}/auth/verify-email?token={verification_token}"
+        verification_url = _VERIFY_EMAIL_URL_PREFIX + verification_token
         subject = "Verify Your SoleCraft Account"
-        
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Verify Your Email</title>
-        </head>
-        <body>
-            <div class="container">
-                 <h1>Verify Your Email Address</h1>
-                 <p>Click the link below to verify your email address.</p>
-                 <a href="{verification_url}">Verify Email Address</a>
-            </div>
-        </body>
-        </html>
-        """
-        
-        text_content = f"""
-        Verify Your Email Address
-        Copy and paste this link into your browser to verify your account:
-        {verification_url}
-        """
-        
-        success = email_service.send_email(email, subject, html_content, text_content)
+        success = await _send_templated_email(
+            "verification", email, subject, verification_url=verification_url
+        )
 
         if success:
             logger.info("Verification email sent successfully", user_id=user_id, email=email)
@@ -143,26 +513,13 @@ def send_verification_email(user_id: str, email: str, verification_token: str):
         logger.error("Verification email task failed", error=str(e), user_id=user_id, email=email)
 
 
-def send_order_confirmation_email(user_id: str, email: str, order_id: str, order_total: float):
+async def send_order_confirmation_email(user_id: str, email: str, order_id: str, order_total: float):
     """Send order confirmation email."""
     try:
-        email_service = EmailService()
         subject = f"Your SoleCraft Order Confirmation #{order_id}"
-        
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <body>
-            <h1>Order Confirmed!</h1>
-            <p>Thank you for your order. Your order number is {order_id}.</p>
-            <p>Total: ${order_total:.2f}</p>
-        </body>
-        </html>
-        """
-        
-        text_content = f"Order Confirmed! Your order number is {order_id}. Total: ${order_total:.2f}"
-        
-        success = email_service.send_email(email, subject, html_content, text_content)
+        success = await _send_templated_email(
+            "order_confirmation", email, subject, order_id=order_id, order_total=order_total
+        )
         
         if success:
             logger.info("Order confirmation email sent successfully", order_id=order_id, user_id=user_id)
@@ -173,27 +530,12 @@ def send_order_confirmation_email(user_id: str, email: str, order_id: str, order
         logger.error("Order confirmation email task failed", error=str(e), order_id=order_id)
 
 
-def send_password_reset_email(email: str, reset_token: str):
+async def send_password_reset_email(email: str, reset_token: str):
     """Send password reset email."""
     try:
-        email_service = EmailService()
-        reset_url = f"{settings.frontend_url}/reset-password?token={reset_token}"
+        reset_url = _RESET_PASSWORD_URL_PREFIX + reset_token
         subject = "Reset Your SoleCraft Password"
-        
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <body>
-            <h1>Password Reset Request</h1>
-            <p>Click the link below to reset your password.</p>
-            <a href="{reset_url}">Reset Password</a>
-        </body>
-        </html>
-        """
-        
-        text_content = f"Reset your password using this link: {reset_url}"
-        
-        success = email_service.send_email(email, subject, html_content, text_content)
+        success = await _send_templated_email("password_reset", email, subject, reset_url=reset_url)
         
         if success:
             logger.info("Password reset email sent successfully", email=email)
@@ -204,21 +546,12 @@ def send_password_reset_email(email: str, reset_token: str):
         logger.error("Password reset email task failed", error=str(e), email=email)
 
 
-def send_low_inventory_alert(alert_data: dict):
-    """Send low inventory alert."""
+async def send_low_inventory_alerts(alerts: List[Dict[str, Any]]):
+    """Send one low inventory digest covering every product in `alerts`."""
+    if not alerts:
+        return
     try:
-        email_service = EmailService()
-        subject = "Low Inventory Alert"
-        product_name = alert_data.get("product_name", "N/A")
-        current_stock = alert_data.get("current_stock", "N/A")
-        
-        html_content = f"""
-        <h1>Low Inventory Alert</h1>
-        <p>Product: {product_name}</p>
-        <p>Current Stock: {current_stock}</p>
-        """
-        
-        text_content = f"Low Inventory Alert: {product_name} is low on stock ({current_stock} left)."
+        subject = f"Low Inventory Alert: {len(alerts)} product(s)"
         
         # This alert should probably go to an admin email address
         admin_email = settings.admin_email 
@@ -226,27 +559,59 @@ def send_low_inventory_alert(alert_data: dict):
             logger.warning("Admin email not set, cannot send low inventory alert.")
             return
 
-        success = email_service.send_email(admin_email, subject, html_content, text_content)
+        success = await _send_templated_email(
+            "low_inventory",
+            admin_email,
+            subject,
+            alerts=[
+                {
+                    "product_name": alert.get("product_name", "N/A"),
+                    "current_stock": alert.get("current_stock", "N/A"),
+                }
+                for alert in alerts
+            ],
+        )
         
         if success:
-            logger.info("Low inventory alert sent successfully", alert_data=alert_data)
+            logger.info("Low inventory alert sent successfully", alert_count=len(alerts))
         else:
-            logger.warning("Failed to send low inventory alert", alert_data=alert_data)
+            logger.warning("Failed to send low inventory alert", alert_count=len(alerts))
 
     except Exception as e:
-        logger.error("Low inventory alert task failed", error=str(e), alert_data=alert_data)
+        logger.error("Low inventory alert task failed", error=str(e), alert_count=len(alerts))
 
 
 # Order Processing and Cleanup Tasks
 
-from core.database import get_async_session
-from models.orm.order import Order, OrderItem
-from models.orm.product import Product
-from models.orm.user import User
-from models.orm.cart import Cart, CartItem
-from sqlalchemy import select, delete, and_, func
-from datetime import datetime, timedelta
-import asyncio
+
+@asynccontextmanager
+async def _advisory_lock(name: str):
+    """
+    Hold a Postgres session-level advisory lock on a dedicated connection so
+    the same cleanup never runs concurrently across processes. Yields whether
+    the lock was acquired.
+    """
+    key = zlib.crc32(name.encode()) & 0x7FFFFFFF
+    # AUTOCOMMIT: the lock is session-level, so don't leave the connection
+    # idle in transaction while the cleanup runs
+    engine = db_manager.async_engine.execution_options(isolation_level="AUTOCOMMIT")
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key})
+        acquired = result.scalar()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+
+
+# Maximum number of rows removed per statement by the batched cleanup jobs
+CLEANUP_BATCH_SIZE = 1000
+# Batches run in savepoints and are committed together every N batches
+CLEANUP_BATCHES_PER_COMMIT = 10
+CLEANUP_MAX_CONSECUTIVE_FAILURES = 3
+# Guest orders in these payment states carry no financial record worth keeping
+DISPOSABLE_PAYMENT_STATUSES = ("pending", "failed")
 
 
 async def process_order_payment(order_id: int):
@@ -256,9 +621,9 @@ async def process_order_payment(order_id: int):
     try:
         logger.info("Processing payment for order", order_id=order_id)
         
-        async with get_async_session() as session:
-            result = await session.execute(select(Order).where(Order.id == order_id))
-            order = result.scalar_one_or_none()
+        async with db_manager.get_async_session() as session:
+            # The customer is joined into the same query for the confirmation email
+            order = await session.get(Order, order_id, options=[joinedload(Order.user)])
             
             if not order or order.payment_status != "pending":
                 logger.warning("Order not found or payment already processed", order_id=order_id)
@@ -266,36 +631,41 @@ async def process_order_payment(order_id: int):
 
             # Simulate payment processing delay
             await asyncio.sleep(2)
+            user = order.user
             
             order.payment_status = "completed"
-            order.order_status = "processing"
-            order.updated_at = datetime.utcnow()
+            order.status = "processing"
             
             await session.commit()
-            
-            if order.user_id:
-                user_result = await session.execute(select(User).where(User.id == order.user_id))
-                user = user_result.scalar_one_or_none()
-                if user and user.email:
-                    send_order_confirmation_email(
-                        str(order.user_id), 
-                        user.email, 
-                        str(order_id), 
-                        float(order.total_amount)
-                    )
-            
-            logger.info("Payment processed successfully", order_id=order_id)
-            await update_inventory_after_order(order_id)
 
     except Exception as e:
+        # Only the payment itself is rolled back to failed; once the commit
+        # above succeeds the order stays completed whatever happens next
         logger.error("Failed to process payment", order_id=order_id, error=str(e))
-        async with get_async_session() as session:
-            result = await session.execute(select(Order).where(Order.id == order_id))
-            order = result.scalar_one_or_none()
-            if order:
+        async with db_manager.get_async_session() as session:
+            order = await session.get(Order, order_id)
+            if order and order.payment_status == "pending":
                 order.payment_status = "failed"
-                order.order_status = "cancelled"
+                order.status = "cancelled"
                 await session.commit()
+        return
+    
+    logger.info("Payment processed successfully", order_id=order_id)
+    
+    # Follow-up work runs only after the commit, with the session closed,
+    # and the confirmation email overlaps the inventory update
+    follow_ups = [update_inventory_after_order(order_id)]
+    if user and user.email:
+        follow_ups.append(send_order_confirmation_email(
+            str(order.user_id), 
+            user.email, 
+            str(order_id), 
+            float(order.total_amount)
+        ))
+    try:
+        await asyncio.gather(*follow_ups)
+    except Exception as e:
+        logger.error("Payment follow-up tasks failed", order_id=order_id, error=str(e))
 
 
 async def update_inventory_after_order(order_id: int):
@@ -304,33 +674,52 @@ async def update_inventory_after_order(order_id: int):
     """
     try:
         logger.info("Updating inventory for order", order_id=order_id)
-        async with get_async_session() as session:
+        async with db_manager.get_async_session() as session:
+            # Sum per product so a product on several lines is decremented once
             result = await session.execute(
-                select(OrderItem).where(OrderItem.order_id == order_id)
+                select(OrderItem.product_id, func.sum(OrderItem.quantity))
+                .join(Order)
+                .where(
+                    OrderItem.order_id == order_id,
+                    Order.payment_status == "completed",
+                )
+                .group_by(OrderItem.product_id)
             )
-            order_items = result.scalars().all()
-            
-            low_stock_alerts = []
+            ordered_quantities = result.all()
+            if not ordered_quantities:
+                return
             
-            for item in order_items:
-                product_result = await session.execute(
-                    select(Product).where(Product.id == item.product_id)
-                )
-                product = product_result.scalar_one_or_none()
-                
-                if product:
-                    product.stock_quantity -= item.quantity
-                    if product.stock_quantity <= 5:
-                        low_stock_alerts.append({
-                            "product_id": product.id,
-                            "product_name": product.name,
-                            "current_stock": product.stock_quantity
-                        })
+            # One UPDATE ... FROM (VALUES ...) for the whole order; the
+            # decrement happens in the database, so concurrent orders can't
+            # overwrite each other's stock changes
+            ordered = values(
+                column("product_id", UUID(as_uuid=True)),
+                column("quantity", Integer),
+                name="ordered",
+            ).data([tuple(row) for row in ordered_quantities])
+            decremented = (
+                update(Product)
+                .where(Product.id == ordered.c.product_id)
+                .values(stock_quantity=Product.stock_quantity - ordered.c.quantity)
+                .returning(Product.id, Product.name, Product.stock_quantity)
+                .cte("decremented")
+            )
+            # Only products that are now low come back from the database
+            result = await session.execute(
+                select(decremented).where(decremented.c.stock_quantity <= 5)
+            )
+            low_stock_alerts = [
+                {
+                    "product_id": product_id,
+                    "product_name": name,
+                    "current_stock": stock_quantity
+                }
+                for product_id, name, stock_quantity in result.all()
+            ]
             
             await session.commit()
             
-            for alert in low_stock_alerts:
-                send_low_inventory_alert(alert)
+            await send_low_inventory_alerts(low_stock_alerts)
             
             logger.info("Inventory updated successfully", order_id=order_id)
 
@@ -340,36 +729,51 @@ async def update_inventory_after_order(order_id: int):
 
 # Scheduled Tasks
 
+# Built once: each run only binds new cutoffs, and hits the compiled cache
+_CANCEL_STALE_ORDERS = (
+    update(Order)
+    .where(
+        Order.payment_status == "pending",
+        Order.created_at < bindparam("stale_cutoff"),
+    )
+    .values(payment_status="failed", status="cancelled")
+    .execution_options(synchronize_session=False)
+)
+_COUNT_PENDING_ORDERS = select(func.count()).select_from(Order).where(
+    Order.payment_status == "pending",
+    Order.created_at.between(bindparam("stale_cutoff"), bindparam("cutoff")),
+)
+
+
 async def process_pending_orders():
     """
     Periodic task to process orders that are stuck in pending status.
     """
     try:
         logger.info("Processing pending orders")
-        async with get_async_session() as session:
-            cutoff_time = datetime.utcnow() - timedelta(hours=1)
+        async with db_manager.get_async_session() as session:
+            now = datetime.utcnow()
+            cutoff_time = now - timedelta(hours=1)
+            stale_cutoff = now - timedelta(hours=24)
+
+            # Cancel every stale order in one statement
             result = await session.execute(
-                select(Order).where(
-                    and_(
-                        Order.payment_status == "pending",
-                        Order.created_at < cutoff_time
-                    )
-                )
+                _CANCEL_STALE_ORDERS, {"stale_cutoff": stale_cutoff}
             )
-            pending_orders = result.scalars().all()
-            
-            for order in pending_orders:
-                if order.created_at < datetime.utcnow() - timedelta(hours=24):
-                    order.payment_status = "failed"
-                    order.order_status = "cancelled"
-                    logger.info("Cancelled stale order", order_id=order.id)
-                else:
-                    # In a simplified setup, we just log this. 
-                    # A more complex retry could be added if needed.
-                    logger.info("Order is still pending", order_id=order.id)
-            
+            # rowcount instead of RETURNING: a large backlog never lands in memory
+            cancelled = result.rowcount
+
+            # In a simplified setup, we just report the rest.
+            # A more complex retry could be added if needed.
+            still_pending = await session.scalar(
+                _COUNT_PENDING_ORDERS,
+                {"stale_cutoff": stale_cutoff, "cutoff": cutoff_time},
+            )
+
             await session.commit()
-            logger.info(f"Checked {len(pending_orders)} pending orders.")
+            logger.info("Checked pending orders",
+                        cancelled=cancelled,
+                        still_pending=still_pending)
 
     except Exception as e:
         logger.error("Failed to process pending orders", error=str(e))
@@ -381,44 +785,100 @@ async def check_low_inventory():
     """
     try:
         logger.info("Checking for low inventory")
-        async with get_async_session() as session:
+        async with db_manager.get_async_session() as session:
+            # Plain column rows: no ORM identity map or instrumentation needed
             result = await session.execute(
-                select(Product).where(Product.stock_quantity <= 5)
+                select(Product.id, Product.name, Product.stock_quantity).where(
+                    Product.stock_quantity <= 5,
+                    Product.is_active.is_(True),
+                )
             )
-            low_stock_products = result.scalars().all()
+            low_stock_products = result.all()
             
-            for product in low_stock_products:
-                send_low_inventory_alert({
-                    "product_id": product.id,
-                    "product_name": product.name,
-                    "current_stock": product.stock_quantity
-                })
+            await send_low_inventory_alerts([
+                {
+                    "product_id": product_id,
+                    "product_name": name,
+                    "current_stock": stock_quantity
+                }
+                for product_id, name, stock_quantity in low_stock_products
+            ])
         logger.info(f"Found {len(low_stock_products)} products with low stock.")
 
     except Exception as e:
         logger.error("Failed to check low inventory", error=str(e))
 
 
+def _eligible_guest(cutoff_date: datetime):
+    """Guests created before `cutoff_date` with no orders outside DISPOSABLE_PAYMENT_STATUSES."""
+    kept_order = aliased(Order)
+    return and_(
+        User.is_guest == True,
+        User.created_at < cutoff_date,
+        ~exists().where(
+            and_(
+                kept_order.user_id == User.id,
+                kept_order.payment_status.not_in(DISPOSABLE_PAYMENT_STATUSES),
+            )
+        ),
+    )
+
+
+def _abandoned_cart(cutoff_date: datetime):
+    """Carts not updated since `cutoff_date`."""
+    return Cart.updated_at < cutoff_date
+
+
 async def cleanup_guest_users():
     """
     Cleanup guest users and their associated data that are older than 7 days.
+    Only pending/failed orders are deleted; guests with any other order
+    (completed, processing, refunded, ...) are kept along with those records.
+    Relies on ix_user_guest_created_at and ix_order_user_id_payment_status.
     """
     try:
         logger.info("Starting guest users cleanup")
-        async with get_async_session() as session:
-            cutoff_date = datetime.utcnow() - timedelta(days=7)
-            
-            result = await session.execute(
-                select(User).where(and_(User.is_guest == True, User.created_at < cutoff_date))
-            )
-            guest_users = result.scalars().all()
-            
-            for user in guest_users:
-                # Basic check, can be expanded
-                await session.delete(user)
+        async with _advisory_lock("cleanup_guest_users") as acquired:
+            if not acquired:
+                logger.info("Guest users cleanup already running, skipping")
+                return {"status": "skipped"}
+            async with db_manager.get_async_session() as session:
+                cutoff_date = datetime.utcnow() - timedelta(days=7)
+                
+                eligible_guest = _eligible_guest(cutoff_date)
+                probe = await session.execute(select(literal(1)).where(eligible_guest).limit(1))
+                if probe.scalar() is None:
+                    logger.info("No guest users to clean up.")
+                    return {"deleted_users": 0, "deleted_orders": 0}
+
+                # Join against "user" (DELETE ... USING) rather than IN (subquery);
+                # carts, cart items, addresses and order items go via ON DELETE CASCADE
+                orders_result = await session.execute(
+                    delete(Order)
+                    .where(
+                        Order.user_id == User.id,
+                        Order.payment_status.in_(DISPOSABLE_PAYMENT_STATUSES),
+                        eligible_guest,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                await session.execute(
+                    delete(Review)
+                    .where(Review.user_id == User.id, eligible_guest)
+                    .execution_options(synchronize_session=False)
+                )
+                users_result = await session.execute(
+                    delete(User)
+                    .where(eligible_guest)
+                    .execution_options(synchronize_session=False)
+                )
 
-            await session.commit()
-            logger.info(f"Cleaned up {len(guest_users)} guest users.")
+                await session.commit()
+                logger.info(f"Cleaned up {users_result.rowcount} guest users.")
+                return {
+                    "deleted_users": users_result.rowcount,
+                    "deleted_orders": orders_result.rowcount,
+                }
 
     except Exception as e:
         logger.error("Failed to cleanup guest users", error=str(e))
@@ -427,24 +887,97 @@ async def cleanup_guest_users():
 async def cleanup_abandoned_carts():
     """
     Cleanup abandoned carts that haven't been updated in 30 days.
+    Deletes in batches of CLEANUP_BATCH_SIZE, each in its own savepoint, and
+    commits every CLEANUP_BATCHES_PER_COMMIT batches.
+    Relies on ix_cart_updated_at_id for keyset pagination.
     """
     try:
         logger.info("Starting abandoned carts cleanup")
-        async with get_async_session() as session:
-            cutoff_date = datetime.utcnow() - timedelta(days=30)
-            
-            await session.execute(
-                delete(CartItem).where(
-                    CartItem.cart_id.in_(select(Cart.id).where(Cart.updated_at < cutoff_date))
-                )
-            )
-            
-            result = await session.execute(
-                delete(Cart).where(Cart.updated_at < cutoff_date)
-            )
-            
-            await session.commit()
-            logger.info(f"Cleaned up {result.rowcount} abandoned carts.")
+        async with _advisory_lock("cleanup_abandoned_carts") as acquired:
+            if not acquired:
+                logger.info("Abandoned carts cleanup already running, skipping")
+                return {"status": "skipped"}
+            async with db_manager.get_async_session() as session:
+                cutoff_date = datetime.utcnow() - timedelta(days=30)
+                total_deleted = 0
+                batches = 0
+                failed_batches = 0
+                consecutive_failures = 0
+                last_key = None
+                
+                while True:
+                    # Keyset pagination: resume after the last (updated_at, id) seen
+                    stmt = select(Cart.updated_at, Cart.id).where(_abandoned_cart(cutoff_date))
+                    if last_key is not None:
+                        stmt = stmt.where(tuple_(Cart.updated_at, Cart.id) > last_key)
+                    rows = (
+                        await session.execute(
+                            stmt.order_by(Cart.updated_at, Cart.id).limit(CLEANUP_BATCH_SIZE)
+                        )
+                    ).all()
+                    if not rows:
+                        break
+                    cart_ids = [row.id for row in rows]
+                    last_key = tuple_(rows[-1].updated_at, rows[-1].id)
+                
+                    # Cart items are removed by ON DELETE CASCADE
+                    try:
+                        async with session.begin_nested():
+                            result = await session.execute(
+                                delete(Cart)
+                                # Re-check staleness: a cart touched since the
+                                # keyset SELECT must survive
+                                .where(Cart.id.in_(cart_ids), _abandoned_cart(cutoff_date))
+                                .execution_options(synchronize_session=False)
+                            )
+                        total_deleted += result.rowcount
+                        consecutive_failures = 0
+                    except Exception as e:
+                        failed_batches += 1
+                        consecutive_failures += 1
+                        logger.warning("Failed to delete abandoned cart batch", error=str(e))
+                        # A persistent error (e.g. lock timeouts) is not a clean run
+                        if consecutive_failures >= CLEANUP_MAX_CONSECUTIVE_FAILURES:
+                            raise
+                
+                    batches += 1
+                    if batches % CLEANUP_BATCHES_PER_COMMIT == 0:
+                        await session.commit()
+                
+                    if len(cart_ids) < CLEANUP_BATCH_SIZE:
+                        break
+                    # Yield between batches to ease lock and replication pressure
+                    await asyncio.sleep(0.05)
+                
+                await session.commit()
+                logger.info("Cleaned up abandoned carts",
+                            deleted_carts=total_deleted,
+                            failed_batches=failed_batches)
+                return {"deleted_carts": total_deleted, "failed_cart_batches": failed_batches}
 
     except Exception as e:
-        logger.error("Failed to cleanup abandoned carts", error=str(e)) 
\ No newline at end of file
+        logger.error("Failed to cleanup abandoned carts", error=str(e))
+
+
+async def run_all_cleanups():
+    """
+    Run the cleanup jobs one after another and log a combined summary keyed
+    by job. The guest cleanup cascades into the same cart rows the cart job
+    deletes, so running them concurrently could deadlock. A job that was
+    skipped because another run holds its lock reports {"status": "skipped"};
+    one that raised or returned nothing reports {"status": "failed"}.
+    """
+    jobs = {
+        "guest_users": cleanup_guest_users,
+        "abandoned_carts": cleanup_abandoned_carts,
+    }
+    summary = {}
+    for name, job in jobs.items():
+        try:
+            result = await job()
+        except Exception as e:
+            logger.error("Cleanup job failed", job=name, error=str(e))
+            result = None
+        summary[name] = result if isinstance(result, dict) else {"status": "failed"}
+    logger.info("Cleanup jobs completed", **summary)
+    return summary
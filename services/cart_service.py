@@ -6,6 +6,7 @@ from typing import Optional, List, Dict, Any
 from uuid import UUID
 from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload, joinedload
 import structlog
@@ -190,11 +191,18 @@ class CartService:
     ) -> bool:
         """Clear all items from a user's cart."""
         try:
-            cart = await self.get_cart_by_user_id(session, user_id)
+            result = await session.execute(select(Cart).where(Cart.user_id == user_id))
+            cart = result.scalar_one_or_none()
             if cart:
-                for item in cart.items:
-                    await session.delete(item)
                 await session.flush()
+                # "fetch" marks CartItems already loaded into this session (e.g. by
+                # order creation) as deleted, so none linger as stale objects
+                await session.execute(
+                    delete(CartItem)
+                    .where(CartItem.cart_id == cart.id)
+                    .execution_options(synchronize_session="fetch")
+                )
+                session.expire(cart, ["items"])
                 logger.info("Cart cleared", cart_id=cart.id, user_id=user_id)
                 return True
             return False
@@ -2,6 +2,7 @@
 Product service containing business logic.
 """
 
+from functools import lru_cache
 from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID
 from slugify import slugify
@@ -19,6 +20,12 @@ from models.orm import Product
 logger = structlog.get_logger(__name__)
 
 
+@lru_cache(maxsize=1024)
+def _slugify(name: str) -> str:
+    """Cached slugify to avoid repeated Unidecode work for the same names."""
+    return slugify(name)
+
+
 class ProductService:
     """Product service for business logic."""
 
@@ -30,7 +37,7 @@ class ProductService:
         product_dict = product_data.model_dump()
         
         if not product_data.slug:
-            product_dict["slug"] = slugify(product_data.name)
+            product_dict["slug"] = _slugify(product_data.name)
         
         existing_product = await self.get_product_by_slug(product_dict["slug"])
         if existing_product:
@@ -81,7 +88,7 @@ class ProductService:
             if existing_product_slug and existing_product_slug.id != product_id:
                 raise ValueError(f"Product with slug '{update_data['slug']}' already exists.")
         elif "name" in update_data and "slug" not in update_data:
-            update_data["slug"] = slugify(update_data["name"])
+            update_data["slug"] = _slugify(update_data["name"])
 
         stmt = (
             update(Product)
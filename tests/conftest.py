@@ -3,36 +3,63 @@ Pytest configuration and fixtures.
 """
 
 import asyncio
+import os
+import sys
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from main import app
 from core.config import settings
 from core.database import get_async_session, Base
-from middleware.auth import get_password_hash, create_access_token
+from core.security import get_password_hash, create_access_token
 
-# Use a separate database for testing
-TEST_DATABASE_URL = settings.database_url.replace("solecraft_db", "solecraft_test_db")
+# Use a separate test database per pytest-xdist worker ("master" when not parallel)
+WORKER_ID = os.environ.get("PYTEST_XDIST_WORKER", "master")
+TEST_DATABASE_NAME = f"solecraft_test_db_{WORKER_ID}"
+TEST_DATABASE_URL = settings.database_url.replace("solecraft_db", TEST_DATABASE_NAME)
+
+
+# uvloop ships with uvicorn[standard] but is unavailable on Windows
+if sys.platform != "win32":
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
 
 
 @pytest.fixture(scope="session")
 def event_loop():
-    """Create an instance of the default event loop for the test session."""
+    """Create an instance of the event loop (uvloop when available) for the test session."""
     loop = asyncio.get_event_loop_policy().new_event_loop()
     yield loop
     loop.close()
 
 
+@pytest_asyncio.fixture(scope="session")
+async def worker_database():
+    """Create this worker's test database if it does not exist yet."""
+    engine = create_async_engine(settings.database_url, isolation_level="AUTOCOMMIT")
+    async with engine.connect() as conn:
+        exists = await conn.scalar(
+            text("SELECT 1 FROM pg_database WHERE datname = :name"),
+            {"name": TEST_DATABASE_NAME},
+        )
+        if not exists:
+            await conn.execute(text(f'CREATE DATABASE "{TEST_DATABASE_NAME}"'))
+    await engine.dispose()
+
+
 @pytest_asyncio.fixture(scope="function")
-async def test_db():
+async def test_db(worker_database):
     """Create a test database."""
     engine = create_async_engine(
         TEST_DATABASE_URL,
         poolclass=StaticPool,
-        connect_args={"check_same_thread": False},
         echo=False,
     )
     
@@ -169,6 +196,12 @@ async def admin_user_token(client: AsyncClient, db_session: AsyncSession):
     return access_token
 
 
+@pytest.fixture
+def admin_headers(admin_user_token: str):
+    """Authorization headers for the admin user."""
+    return {"Authorization": f"Bearer {admin_user_token}"}
+
+
 @pytest.fixture
 def sample_product_data(test_category):
     """Sample product data for testing."""
@@ -0,0 +1,326 @@
+"""
+Background task tests.
+"""
+
+from decimal import Decimal
+from types import SimpleNamespace
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.orm.order import Order, OrderItem
+from models.orm.product import Product
+from models.orm.user import User
+from services import background_tasks_service as bts
+from services.background_tasks_service import (
+    CircuitBreaker,
+    EmailService,
+    SendGridRetryableError,
+    TokenBucket,
+    SENDGRID_MAX_RETRY_DELAY,
+    SENDGRID_RETRY_BASE_DELAY,
+    _backoff_delay,
+    _render_email,
+    _retry_after,
+)
+
+
+class FakeClock:
+    """Stand-in for time.monotonic that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(bts.time, "monotonic", fake)
+    return fake
+
+
+@pytest.mark.unit
+class TestTokenBucket:
+    """Test the SendGrid token bucket."""
+
+    def test_consume_up_to_capacity(self, clock):
+        """A full bucket hands out exactly `capacity` tokens."""
+        bucket = TokenBucket(rate=1, capacity=3)
+
+        assert [bucket.consume() for _ in range(4)] == [True, True, True, False]
+
+    def test_refills_at_rate(self, clock):
+        """Tokens come back at `rate` per second, capped at capacity."""
+        bucket = TokenBucket(rate=2, capacity=2)
+        bucket.consume(2)
+
+        clock.advance(0.5)
+        assert bucket.consume() is True
+        assert bucket.consume() is False
+
+        clock.advance(60)
+        assert bucket.consume(2) is True
+        assert bucket.consume() is False
+
+    @pytest.mark.asyncio
+    async def test_acquire_gives_up_past_timeout(self):
+        """acquire() returns False instead of waiting longer than `timeout`."""
+        bucket = TokenBucket(rate=0.001, capacity=1)
+        bucket.consume()
+
+        assert await bucket.acquire(timeout=0.01) is False
+
+
+@pytest.mark.unit
+class TestCircuitBreaker:
+    """Test the SendGrid circuit breaker."""
+
+    def test_opens_after_threshold(self, clock):
+        """Consecutive failures up to the threshold open the circuit."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+        breaker.record_failure()
+        assert breaker.allow_request() is True
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.allow_request() is False
+
+    def test_half_open_allows_single_probe(self, clock):
+        """After the reset timeout only one caller gets through."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        breaker.record_failure()
+        clock.advance(30)
+
+        assert breaker.allow_request() is True
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request() is False
+
+    def test_probe_success_closes(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        breaker.record_failure()
+        clock.advance(30)
+        breaker.allow_request()
+
+        breaker.record_success()
+
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow_request() is True
+        assert breaker.allow_request() is True
+
+    def test_probe_failure_reopens(self, clock):
+        breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+        for _ in range(5):
+            breaker.record_failure()
+        clock.advance(30)
+        breaker.allow_request()
+
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.allow_request() is False
+
+    def test_lost_probe_expires(self, clock):
+        """A probe that never reports back frees the slot after reset_timeout."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        breaker.record_failure()
+        clock.advance(30)
+        assert breaker.allow_request() is True
+
+        clock.advance(30)
+        assert breaker.allow_request() is True
+
+
+@pytest.mark.unit
+class TestDeferredReplay:
+    """Test replaying sends deferred during a SendGrid outage."""
+
+    @pytest_asyncio.fixture
+    async def service(self, monkeypatch):
+        monkeypatch.setattr(bts.settings, "sendgrid_api_key", "test-key")
+        service = EmailService()
+        yield service
+        await service.close()
+
+    @staticmethod
+    def _queue(service, count: int):
+        items = [(b"body", f"user{i}@example.com", "Subject") for i in range(count)]
+        service._deferred.extend(items)
+        return items
+
+    @pytest.mark.asyncio
+    async def test_replays_everything_when_healthy(self, service, monkeypatch):
+        self._queue(service, 3)
+
+        async def deliver(body, to_email, subject_text):
+            return True
+
+        monkeypatch.setattr(service, "_attempt", deliver)
+
+        assert await service.retry_deferred() == 3
+        assert service.deferred_count == 0
+
+    @pytest.mark.asyncio
+    async def test_stops_at_first_retryable_failure(self, service, monkeypatch):
+        """The failing send and everything after it go back on the queue, in order."""
+        items = self._queue(service, 4)
+        attempted = []
+
+        async def flaky(body, to_email, subject_text):
+            attempted.append(to_email)
+            if len(attempted) == 2:
+                raise SendGridRetryableError("SendGrid circuit open")
+            return True
+
+        monkeypatch.setattr(service, "_attempt", flaky)
+
+        assert await service.retry_deferred() == 1
+        assert len(attempted) == 2
+        assert list(service._deferred) == items[1:]
+
+
+@pytest.mark.unit
+class TestRetryBackoff:
+    """Test retry delay helpers."""
+
+    @pytest.mark.parametrize("attempt", [1, 2, 3, 10])
+    def test_backoff_within_cap(self, attempt):
+        ceiling = min(SENDGRID_MAX_RETRY_DELAY, SENDGRID_RETRY_BASE_DELAY * 2 ** attempt)
+        for _ in range(50):
+            assert 0 <= _backoff_delay(attempt) <= ceiling
+
+    def test_backoff_honours_retry_after(self):
+        for _ in range(50):
+            assert _backoff_delay(1, retry_after=5) >= 5
+
+    def test_backoff_caps_retry_after(self):
+        assert _backoff_delay(1, retry_after=3600) == SENDGRID_MAX_RETRY_DELAY
+
+    def test_retry_after_seconds(self):
+        response = httpx.Response(429, headers={"Retry-After": "7"})
+        assert _retry_after(response) == 7.0
+
+    def test_retry_after_missing_or_unparseable(self):
+        assert _retry_after(httpx.Response(503)) is None
+        response = httpx.Response(503, headers={"Retry-After": "Wed, 21 Oct 2026 07:28:00 GMT"})
+        assert _retry_after(response) is None
+
+
+@pytest.mark.unit
+class TestEmailRendering:
+    """Test precompiled email templates."""
+
+    def test_low_inventory_digest(self):
+        """One digest lists every alert, with HTML escaping."""
+        alerts = [
+            {"product_name": "Runner <Pro>", "current_stock": 2},
+            {"product_name": "Trail Boot", "current_stock": 0},
+        ]
+
+        html, text = _render_email("low_inventory", alerts=alerts)
+
+        assert "2 product(s)" in html
+        assert "Runner &lt;Pro&gt;" in html
+        assert "<td>Trail Boot</td><td>0</td>" in html
+        assert "- Runner <Pro>: 2 left" in text
+        assert "- Trail Boot: 0 left" in text
+
+
+@pytest.mark.db
+class TestInventory:
+    """Test stock decrements and low-stock detection against the test database."""
+
+    @pytest.fixture
+    def alerts(self, monkeypatch, test_db):
+        """Route task sessions to the test database and capture alert digests."""
+        sent = []
+
+        async def capture(batch):
+            sent.append(batch)
+
+        monkeypatch.setattr(bts, "db_manager", SimpleNamespace(get_async_session=test_db))
+        monkeypatch.setattr(bts, "send_low_inventory_alerts", capture)
+        return sent
+
+    @staticmethod
+    def _product(slug: str, stock_quantity: int, is_active: bool = True) -> Product:
+        return Product(
+            name=slug.title(),
+            slug=slug,
+            base_price=Decimal("50.00"),
+            stock_quantity=stock_quantity,
+            is_active=is_active,
+        )
+
+    @staticmethod
+    def _item(order: Order, product: Product, quantity: int) -> OrderItem:
+        return OrderItem(
+            order_id=order.id,
+            product_id=product.id,
+            product_name=product.name,
+            variant_name="Default",
+            sku=f"{product.slug}-{quantity}",
+            quantity=quantity,
+            unit_price=product.base_price,
+            total_price=product.base_price * quantity,
+        )
+
+    @pytest.mark.asyncio
+    async def test_update_inventory_after_order(self, db_session: AsyncSession, alerts):
+        """One statement decrements every product and reports only low ones."""
+        runner = self._product("runner", 6)
+        boot = self._product("boot", 20)
+        user = User(is_guest=True)
+        db_session.add_all([runner, boot, user])
+        await db_session.flush()
+        order = Order(
+            user_id=user.id,
+            order_number="ORD-INVENTORY",
+            subtotal=Decimal("200.00"),
+            total_amount=Decimal("200.00"),
+            shipping_address={},
+            billing_address={},
+            payment_status="completed",
+        )
+        db_session.add(order)
+        await db_session.flush()
+        db_session.add_all([
+            self._item(order, runner, 1),
+            self._item(order, runner, 1),
+            self._item(order, boot, 2),
+        ])
+        await db_session.commit()
+
+        await bts.update_inventory_after_order(order.id)
+
+        stock = dict(
+            (await db_session.execute(select(Product.slug, Product.stock_quantity))).all()
+        )
+        assert stock == {"runner": 4, "boot": 18}
+        assert alerts == [[
+            {"product_id": runner.id, "product_name": "Runner", "current_stock": 4}
+        ]]
+
+    @pytest.mark.asyncio
+    async def test_check_low_inventory(self, db_session: AsyncSession, alerts):
+        """Only active products at or below the threshold are reported."""
+        low = self._product("low", 5)
+        plenty = self._product("plenty", 6)
+        retired = self._product("retired", 0, is_active=False)
+        db_session.add_all([low, plenty, retired])
+        await db_session.commit()
+
+        await bts.check_low_inventory()
+
+        assert alerts == [[
+            {"product_id": low.id, "product_name": "Low", "current_stock": 5}
+        ]]
@@ -10,10 +10,9 @@ class TestProducts:
     """Test product endpoints."""
 
     @pytest.mark.asyncio
-    async def test_create_product_success(self, client: AsyncClient, admin_user_token: str, sample_product_data: dict):
+    async def test_create_product_success(self, client: AsyncClient, admin_headers: dict, sample_product_data: dict):
         """Test successful product creation by an admin."""
-        headers = {"Authorization": f"Bearer {admin_user_token}"}
-        response = await client.post("/products", headers=headers, json=sample_product_data)
+        response = await client.post("/products", headers=admin_headers, json=sample_product_data)
 
         assert response.status_code == 201
         data = response.json()
@@ -41,11 +40,10 @@ class TestProducts:
         assert response.status_code == 403
 
     @pytest.mark.asyncio
-    async def test_list_products(self, client: AsyncClient, sample_product_data: dict, admin_user_token: str):
+    async def test_list_products(self, client: AsyncClient, sample_product_data: dict, admin_headers: dict):
         """Test listing products."""
         # Create a product first
-        headers = {"Authorization": f"Bearer {admin_user_token}"}
-        await client.post("/products", headers=headers, json=sample_product_data)
+        await client.post("/products", headers=admin_headers, json=sample_product_data)
 
         response = await client.get("/products")
         assert response.status_code == 200
@@ -55,10 +53,9 @@ class TestProducts:
         assert data["items"][0]["name"] == sample_product_data["name"]
 
     @pytest.mark.asyncio
-    async def test_get_product_by_id(self, client: AsyncClient, sample_product_data: dict, admin_user_token: str):
+    async def test_get_product_by_id(self, client: AsyncClient, sample_product_data: dict, admin_headers: dict):
         """Test getting a product by ID."""
-        headers = {"Authorization": f"Bearer {admin_user_token}"}
-        create_response = await client.post("/products", headers=headers, json=sample_product_data)
+        create_response = await client.post("/products", headers=admin_headers, json=sample_product_data)
         product_id = create_response.json()["data"]["id"]
 
         response = await client.get(f"/products/{product_id}")
@@ -69,10 +66,9 @@ class TestProducts:
         assert data["data"]["name"] == sample_product_data["name"]
     
     @pytest.mark.asyncio
-    async def test_get_product_by_slug(self, client: AsyncClient, sample_product_data: dict, admin_user_token: str):
+    async def test_get_product_by_slug(self, client: AsyncClient, sample_product_data: dict, admin_headers: dict):
         """Test getting a product by slug."""
-        headers = {"Authorization": f"Bearer {admin_user_token}"}
-        await client.post("/products", headers=headers, json=sample_product_data)
+        await client.post("/products", headers=admin_headers, json=sample_product_data)
         product_slug = sample_product_data["slug"]
 
         response = await client.get(f"/products/slug/{product_slug}")
@@ -82,14 +78,13 @@ class TestProducts:
         assert data["data"]["slug"] == product_slug
 
     @pytest.mark.asyncio
-    async def test_update_product(self, client: AsyncClient, sample_product_data: dict, admin_user_token: str):
+    async def test_update_product(self, client: AsyncClient, sample_product_data: dict, admin_headers: dict):
         """Test updating a product."""
-        headers = {"Authorization": f"Bearer {admin_user_token}"}
-        create_response = await client.post("/products", headers=headers, json=sample_product_data)
+        create_response = await client.post("/products", headers=admin_headers, json=sample_product_data)
         product_id = create_response.json()["data"]["id"]
 
         update_data = {"name": "Updated Test Shoe", "base_price": "129.99"}
-        response = await client.put(f"/products/{product_id}", headers=headers, json=update_data)
+        response = await client.put(f"/products/{product_id}", headers=admin_headers, json=update_data)
         
         assert response.status_code == 200
         data = response.json()
@@ -98,13 +93,12 @@ class TestProducts:
         assert data["data"]["base_price"] == 129.99 # Pydantic converts to float/Decimal
 
     @pytest.mark.asyncio
-    async def test_delete_product(self, client: AsyncClient, sample_product_data: dict, admin_user_token: str):
+    async def test_delete_product(self, client: AsyncClient, sample_product_data: dict, admin_headers: dict):
         """Test deleting a product."""
-        headers = {"Authorization": f"Bearer {admin_user_token}"}
-        create_response = await client.post("/products", headers=headers, json=sample_product_data)
+        create_response = await client.post("/products", headers=admin_headers, json=sample_product_data)
         product_id = create_response.json()["data"]["id"]
 
-        delete_response = await client.delete(f"/products/{product_id}", headers=headers)
+        delete_response = await client.delete(f"/products/{product_id}", headers=admin_headers)
         assert delete_response.status_code == 200
         data = delete_response.json()
         assert data["success"] is True